@@ -0,0 +1,136 @@
+"""Small on-disk cache for LLM results."""
+
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+import fast_json
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """
+    Stores JSON-serializable values as one file per key in a directory.
+    
+    The directory holds at most max_entries entries; beyond that, the least
+    recently used ones are removed. A file's modification time records its
+    last use, since access times are often not updated by the filesystem.
+    """
+    
+    def __init__(self, directory: str, enabled: bool = True, max_entries: int = 0):
+        self.directory = Path(directory).expanduser()
+        self.enabled = enabled
+        # 0 keeps every entry
+        self.max_entries = max_entries
+    
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """
+        Build a cache key from its parts.
+        
+        Args:
+            parts: Strings identifying the cached value
+            
+        Returns:
+            Hex digest of the parts
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value.
+        
+        Args:
+            key: Cache key from make_key()
+            
+        Returns:
+            Cached value, or None if it is missing or unreadable
+        """
+        if not self.enabled:
+            return None
+        
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                value = fast_json.loads(file.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable cache entry %s: %s", key, e)
+            return None
+        
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+    
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a value in the cache.
+        
+        The entry is written to a temporary file and moved into place, so
+        concurrent readers never see a partially written entry. Entries beyond
+        max_entries are evicted afterwards.
+        
+        Args:
+            key: Cache key from make_key()
+            value: JSON-serializable value
+        """
+        if not self.enabled:
+            return
+        
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    file.write(fast_json.dumps(value))
+                os.replace(temp_path, self._path(key))
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Could not write cache entry %s: %s", key, e)
+            return
+        
+        if self.max_entries > 0:
+            self._evict()
+    
+    def _evict(self) -> None:
+        """Remove the least recently used entries beyond max_entries."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.name.endswith('.json'):
+                        try:
+                            entries.append((entry.stat().st_mtime_ns, entry.path))
+                        except FileNotFoundError:
+                            # Removed by another process meanwhile
+                            continue
+        except OSError as e:
+            logger.warning("Could not list cache directory %s: %s", self.directory, e)
+            return
+        
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Could not evict cache entry %s: %s", path, e)
+    
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
@@ -11,14 +11,55 @@ class Settings:
         # Ollama Configuration
         self.ollama_host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
         self.ollama_model = os.getenv("OLLAMA_MODEL", "llama2:7b")
+        self.ollama_keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        self.ollama_num_ctx = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+        # Server-side concurrency and residency knobs. They mirror the Ollama
+        # server's own environment variables and only take effect when the
+        # server is started with the same values; the client uses them to
+        # size request batches.
+        self.ollama_num_parallel_set = "OLLAMA_NUM_PARALLEL" in os.environ
+        self.ollama_num_parallel = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+        self.ollama_max_loaded_models = int(os.getenv("OLLAMA_MAX_LOADED_MODELS", "1"))
+        # Persistent connections kept open to the Ollama server, and how many
+        # seconds an idle one is kept for reuse
+        self.http_pool_size = int(os.getenv("HTTP_POOL_SIZE", "8"))
+        self.http_keepalive = float(os.getenv("HTTP_KEEPALIVE", "300"))
+        # Set SKIP_MODEL_CHECK=1 to trust that the model is installed and skip
+        # the startup query to the Ollama server
+        self.skip_model_check = os.getenv("SKIP_MODEL_CHECK", "False").lower() in ("1", "true")
         
         # Application Settings
         self.debug = os.getenv("DEBUG", "False").lower() == "true"
         self.log_level = os.getenv("LOG_LEVEL", "INFO")
         
+        # Caching of LLM results on disk
+        self.cache_enabled = os.getenv("ENABLE_CACHE", "True").lower() == "true"
+        self.cache_dir = os.path.expanduser(os.getenv("CACHE_DIR", "~/.cache/pdf_analyzer"))
+        # Entries kept in each on-disk cache (analyses, extractions, answers)
+        # before the least recently used are removed; 0 keeps all of them
+        self.cache_max_entries = int(os.getenv("CACHE_MAX_ENTRIES", "100"))
+        # Reuse answers to rephrased questions, matched by embedding similarity
+        self.semantic_cache_enabled = os.getenv("ENABLE_SEMANTIC_CACHE", "True").lower() == "true"
+        self.semantic_cache_threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+        self.ollama_embed_model = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+        
         # PDF Processing
         self.max_pdf_pages = int(os.getenv("MAX_PDF_PAGES", "10"))
-        self.chunk_size = int(os.getenv("CHUNK_SIZE", "2000"))
+        # Worker processes for page extraction; only used for documents with
+        # at least PDF_PARALLEL_MIN_PAGES pages
+        self.pdf_workers = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+        self.pdf_parallel_min_pages = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+        # Characters per chunk of raw document text; RAG_TOP_K chunks of this
+        # size fit in MAX_PROMPT_TOKENS
+        self.chunk_size = int(os.getenv("CHUNK_SIZE", "800"))
+        # Most relevant chunks sent with a question when it is answered from
+        # the raw document text, as many as fit in MAX_PROMPT_TOKENS (0 sends
+        # the text from the start, truncated to MAX_PROMPT_TOKENS)
+        self.rag_top_k = int(os.getenv("RAG_TOP_K", "3"))
+        # Approximate number of document tokens sent to the model per prompt
+        self.max_prompt_tokens = int(os.getenv("MAX_PROMPT_TOKENS", "1000"))
+        # Documents with less text than this are not sent to the model
+        self.min_text_chars = int(os.getenv("MIN_TEXT_CHARS", "50"))
 
 
 # Global settings instance
@@ -0,0 +1,612 @@
+"""Main document analyzer class that orchestrates PDF parsing and LLM analysis."""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import hashlib
+import logging
+import os
+import threading
+import time
+import numpy as np
+from cache import DiskCache
+from pdf_parser import PDFParser
+from llm_client import EXTRACTION_PROMPT_VERSION, count_tokens, get_llm_client
+from semantic_cache import SemanticCache
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Number of recent analyses kept in memory in front of the disk cache
+ANALYSIS_MEMORY_CACHE_SIZE = 16
+
+# Largest magnitude of a quantized embedding component
+INT8_EMBEDDING_MAX = 127
+
+
+@contextmanager
+def _stopwatch(timing: Dict[str, any], key: str) -> Iterator[None]:
+    """
+    Record the duration of a block, in seconds, as timing[key].
+    
+    Args:
+        timing: Dictionary receiving the measurement
+        key: Name of the measurement
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing[key] = time.perf_counter() - start
+
+
+def _quantize_embeddings(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize embeddings to int8 with one scale per vector.
+    
+    Args:
+        embeddings: Float embeddings, one per row (or a single vector)
+        
+    Returns:
+        Tuple of (int8 embeddings, float32 scales); row i is approximately
+        quantized[i] * scales[i]
+    """
+    scales = np.abs(embeddings).max(axis=-1, keepdims=True).astype(np.float32) / INT8_EMBEDDING_MAX
+    scales[scales == 0] = 1
+    quantized = np.round(embeddings / scales).astype(np.int8)
+    return quantized, scales.squeeze(-1)
+
+
+class DocumentAnalyzer:
+    """Main class for analyzing any type of document."""
+    
+    def __init__(self):
+        self.pdf_parser = PDFParser(
+            max_pages=settings.max_pdf_pages,
+            workers=settings.pdf_workers,
+            parallel_min_pages=settings.pdf_parallel_min_pages
+        )
+        self.llm_client = get_llm_client()
+        self.current_document_data = None
+        self.current_document_text = None
+        self.current_document_type = "generic"
+        self.current_document_summary = None
+        self.current_document_key = None
+        # Chunks of the document text and their embeddings, built on first
+        # use; embeddings are kept as int8 with one float32 scale per chunk
+        self._chunks: Optional[List[str]] = None
+        self._chunk_embeddings: Optional[np.ndarray] = None
+        self._chunk_scales: Optional[np.ndarray] = None
+        self._chunk_tokens: Optional[List[int]] = None
+        self.extraction_cache = DiskCache(
+            os.path.join(settings.cache_dir, "extractions"),
+            enabled=settings.cache_enabled, max_entries=settings.cache_max_entries
+        )
+        self.analysis_cache = DiskCache(
+            os.path.join(settings.cache_dir, "analyses"),
+            enabled=settings.cache_enabled, max_entries=settings.cache_max_entries
+        )
+        self._recent_analyses: "OrderedDict[str, Dict[str, any]]" = OrderedDict()
+        # Runs the model check while the PDF is being parsed
+        self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analyzer")
+        self.semantic_cache = SemanticCache(threshold=settings.semantic_cache_threshold) if settings.semantic_cache_enabled else None
+    
+    def analyze_document(self, pdf_path: str, document_type: str = "generic", question: Optional[str] = None) -> Dict[str, any]:
+        """
+        Analyze any PDF document.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            document_type: Type of document (contract, resume, report, etc.)
+            question: Optional first question, answered in the same LLM request as the extraction
+            
+        Returns:
+            Dictionary with analysis results and comprehensive timing information
+        """
+        overall_start_time = time.perf_counter()
+        timing = {
+            'total_analysis_time': 0,
+            'pdf_extraction_time': 0,
+            'model_check_time': 0,
+            'llm_extraction_time': 0,
+            'pdf_timing': {},
+            'llm_timing': {}
+        }
+        
+        try:
+            logger.info("Starting analysis of %s document: %s", document_type, pdf_path)
+            
+            # Reuse the whole analysis when this file was analyzed before;
+            # this skips PDF extraction as well as the LLM
+            file_key = self._file_cache_key(pdf_path, document_type, question)
+            cached = self._get_cached_analysis(file_key) if file_key else None
+            if cached is not None:
+                pdf_data = cached['pdf_data']
+                if cached['document_key'] != self.current_document_key:
+                    # Reloading the current document keeps its embedded chunks
+                    self._chunks = self._chunk_embeddings = None
+                self.current_document_text = pdf_data['full_text']
+                self.current_document_type = document_type
+                self.current_document_data = cached['data']
+                self.current_document_summary = cached.get('summary')
+                self.current_document_key = cached['document_key']
+                logger.info("Using cached analysis of %s", pdf_path)
+                timing['total_analysis_time'] = time.perf_counter() - overall_start_time
+                timing['cache_hit'] = True
+                return self._cached_analysis_result(pdf_data, document_type, timing)
+            
+            # Check the model in the background while the PDF is parsed; the
+            # check is skipped once the model was verified, by the CLI
+            # preflight or an earlier analysis
+            model_check = None
+            if not self.llm_client.model_verified:
+                model_check = self._background.submit(self.llm_client.verify_model)
+            
+            # Extract text from PDF
+            with _stopwatch(timing, 'pdf_extraction_time'):
+                pdf_data = self.pdf_parser.extract_text(pdf_path)
+            timing['pdf_timing'] = pdf_data.get('timing', {})
+            
+            # A document with almost no text, such as a scan, is not sent to
+            # the model. Only the raw text is checked: extractions and the
+            # context of questions may legitimately be short.
+            if len(pdf_data['full_text'].strip()) < settings.min_text_chars:
+                error = f"Document text is too short to analyze (less than {settings.min_text_chars} characters)"
+                logger.warning("Skipping analysis: %s", error)
+                timing['total_analysis_time'] = time.perf_counter() - overall_start_time
+                return {
+                    'success': False,
+                    'error': error,
+                    'pdf_data': pdf_data,
+                    'timing': timing
+                }
+            
+            self.current_document_text = pdf_data['full_text']
+            self._chunks = self._chunk_embeddings = None
+            self.current_document_type = document_type
+            self.current_document_data = None
+            self.current_document_summary = None
+            
+            logger.info("Extracted text from %d pages", pdf_data['page_count'])
+            
+            # Reuse the extraction from an earlier run on the same text, made
+            # with the same prompt, truncation and response format; with a
+            # question the extraction is a JSON object, otherwise plain text
+            text_hash = hashlib.blake2b(self.current_document_text.encode('utf-8'), digest_size=16).hexdigest()
+            self.current_document_key = DiskCache.make_key(
+                text_hash, document_type, self.llm_client.model, str(settings.max_prompt_tokens),
+                EXTRACTION_PROMPT_VERSION, 'json' if question else 'text'
+            )
+            cached = self.extraction_cache.get(self.current_document_key)
+            if cached is not None:
+                self.current_document_data = cached['data']
+                self.current_document_summary = cached.get('summary')
+                logger.info("Using cached extraction for %s document", document_type)
+                self._store_analysis(file_key, pdf_data)
+                timing['total_analysis_time'] = time.perf_counter() - overall_start_time
+                timing['cache_hit'] = True
+                return self._cached_analysis_result(pdf_data, document_type, timing)
+            
+            # Check if LLM model is available; only the part of the check
+            # that did not overlap with PDF extraction is waited for here
+            with _stopwatch(timing, 'model_check_time'):
+                model_available = model_check is None or model_check.result()
+            if not model_available:
+                timing['total_analysis_time'] = time.perf_counter() - overall_start_time
+                return {
+                    'success': False,
+                    'error': f"LLM model '{settings.ollama_model}' not available. Please install it with: ollama pull {settings.ollama_model}",
+                    'pdf_data': pdf_data,
+                    'timing': timing
+                }
+            
+            # Extract structured data using LLM; with a question, the summary
+            # and the answer come back from the same request
+            with _stopwatch(timing, 'llm_extraction_time'):
+                if question:
+                    llm_result = self.llm_client.extract_and_answer(self.current_document_text, document_type, question)
+                else:
+                    llm_result = self.llm_client.extract_document_data(self.current_document_text, document_type)
+            timing['llm_timing'] = llm_result.get('timing', {})
+            
+            answer_data = None
+            if llm_result['success']:
+                self.current_document_data = llm_result['data']
+                self.current_document_summary = llm_result.get('summary')
+                self.extraction_cache.set(self.current_document_key, {
+                    'data': self.current_document_data,
+                    'summary': self.current_document_summary
+                })
+                self._store_analysis(file_key, pdf_data)
+                logger.info("Successfully extracted structured data from %s document", document_type)
+                
+                if llm_result.get('answer'):
+                    # Later runs asking the same question find the answer in
+                    # the answer cache, as if ask_question() had produced it
+                    self.llm_client.cache_answer(question, self.current_document_data, document_type, llm_result['answer'])
+                    answer_data = {
+                        'success': True,
+                        'answer': llm_result['answer'],
+                        'question': question,
+                        'model': llm_result['model'],
+                        'document_type': document_type,
+                        # The answer took as long as the extraction request
+                        # that produced it, which the analysis time includes
+                        'timing': {
+                            'total_question_time': timing['llm_extraction_time'],
+                            'answered_with_extraction': True
+                        }
+                    }
+            else:
+                logger.warning("LLM extraction failed: %s", llm_result['error'])
+            
+            timing['total_analysis_time'] = time.perf_counter() - overall_start_time
+            
+            return {
+                'success': True,
+                'cache_hit': False,
+                'pdf_data': pdf_data,
+                'llm_data': llm_result,
+                'structured_data': self.current_document_data,
+                'answer_data': answer_data,
+                'document_type': document_type,
+                'timing': timing
+            }
+            
+        except Exception as e:
+            error_time = time.perf_counter()
+            logger.error("Error analyzing document: %s", e)
+            return {
+                'success': False,
+                'error': str(e),
+                'pdf_data': None,
+                'llm_data': None,
+                'answer_data': None,
+                'document_type': document_type,
+                'timing': {
+                    'total_analysis_time': error_time - overall_start_time,
+                    'pdf_extraction_time': 0,
+                    'model_check_time': 0,
+                    'llm_extraction_time': 0,
+                    'pdf_timing': {},
+                    'llm_timing': {}
+                }
+            }
+    
+    def ask_question(self, question: str, on_token: Optional[Callable[[str], None]] = None) -> Dict[str, any]:
+        """
+        Ask a question about the currently loaded document.
+        
+        Args:
+            question: Question to ask about the document
+            on_token: Optional callback; when given, the answer is streamed and
+                each piece is passed to it as soon as it is generated
+            
+        Returns:
+            Dictionary with answer and metadata including timing information
+        """
+        question_start_time = time.perf_counter()
+        
+        if not self.current_document_text:
+            return {
+                'success': False,
+                'error': 'No document loaded. Please analyze a document first.',
+                'answer': None,
+                'timing': {
+                    'total_question_time': 0,
+                    'llm_timing': {}
+                }
+            }
+        
+        try:
+            logger.info("Answering question: %s", question)
+            
+            # The question's embedding serves both the semantic cache and
+            # the retrieval of relevant chunks
+            question_embedding = None
+            if self.current_document_key and (self.semantic_cache is not None or self._uses_retrieval()):
+                question_embedding = self.llm_client.embed(question)
+            
+            # Answer rephrasings of earlier questions from the semantic cache
+            if question_embedding is not None and self.semantic_cache is not None:
+                cached = self.semantic_cache.lookup(self.current_document_key, question_embedding)
+                if cached is not None:
+                    cached_question, answer, similarity = cached
+                    logger.info("Answer served from semantic cache (similar to %r, similarity %.3f)", cached_question, similarity)
+                    if on_token:
+                        on_token(answer)
+                    return {
+                        'success': True,
+                        'answer': answer,
+                        'question': question,
+                        'model': self.llm_client.model,
+                        'document_type': self.current_document_type,
+                        'cache_hit': True,
+                        'timing': {
+                            'total_question_time': time.perf_counter() - question_start_time,
+                            'cache_hit': True
+                        }
+                    }
+            
+            data_source = self._question_context(question_embedding)
+            
+            if on_token:
+                result = self.llm_client.answer_question_stream(question, data_source, self.current_document_type, on_token)
+            else:
+                result = self.llm_client.answer_question(question, data_source, self.current_document_type)
+            
+            if question_embedding is not None and self.semantic_cache is not None and result['success']:
+                self.semantic_cache.add(self.current_document_key, question, question_embedding, result['answer'])
+            
+            question_end_time = time.perf_counter()
+            
+            # Add overall question timing to the result
+            if 'timing' not in result:
+                result['timing'] = {}
+            
+            result['timing']['total_question_time'] = question_end_time - question_start_time
+            
+            if result['success']:
+                logger.info("Successfully answered question")
+            else:
+                logger.warning("Failed to answer question: %s", result['error'])
+            
+            return result
+            
+        except Exception as e:
+            error_time = time.perf_counter()
+            logger.error("Error answering question: %s", e)
+            return {
+                'success': False,
+                'error': str(e),
+                'answer': None,
+                'timing': {
+                    'total_question_time': error_time - question_start_time,
+                    'llm_timing': {}
+                }
+            }
+    
+    def ask_questions(self, questions: List[str]) -> List[Dict[str, any]]:
+        """
+        Ask several questions about the currently loaded document concurrently.
+        
+        Args:
+            questions: Questions to ask about the document
+            
+        Returns:
+            List of dictionaries with answers and metadata, in the same order as the questions
+        """
+        if not self.current_document_text:
+            return [
+                {
+                    'success': False,
+                    'error': 'No document loaded. Please analyze a document first.',
+                    'answer': None,
+                    'timing': {}
+                }
+                for _ in questions
+            ]
+        
+        logger.info("Answering %d questions concurrently", len(questions))
+        
+        return self.llm_client.answer_questions_sync(questions, self._question_context(), self.current_document_type)
+    
+    def warm_up(self) -> Optional[threading.Thread]:
+        """
+        Start prefilling the model's prompt cache for questions about the loaded document.
+        
+        The warm-up request runs in a background thread, so it overlaps with
+        the user typing the first question.
+        
+        Returns:
+            The started daemon thread, or None if no document is loaded or
+            questions are answered from retrieved chunks
+        """
+        # With retrieval, each question's prompt holds different chunks, so
+        # there is no shared prefix to prefill
+        if not self.current_document_text or self._uses_retrieval():
+            return None
+        
+        thread = threading.Thread(
+            target=self.llm_client.warm_up,
+            args=(self._question_context(), self.current_document_type),
+            name="llm-warm-up",
+            daemon=True
+        )
+        thread.start()
+        return thread
+    
+    def get_document_summary(self, on_token: Optional[Callable[[str], None]] = None) -> Dict[str, any]:
+        """
+        Get a summary of the currently loaded document.
+        
+        Args:
+            on_token: Optional callback; when given, a newly generated summary
+                is streamed to it as in ask_question()
+            
+        Returns:
+            Dictionary with document summary
+        """
+        if not self.current_document_text:
+            return {
+                'success': False,
+                'error': 'No document loaded. Please analyze a document first.',
+                'summary': None
+            }
+        
+        # Reuse the summary returned alongside the extraction, if any
+        if self.current_document_summary:
+            return {
+                'success': True,
+                'answer': self.current_document_summary,
+                'document_type': self.current_document_type,
+                'timing': {}
+            }
+        
+        # Create document-type specific summary prompts
+        summary_prompts = {
+            "contract": "Provide a brief summary of this contract including the parties involved, contract type, key terms, and important dates.",
+            "resume": "Provide a brief summary of this resume including the person's name, current role, key skills, and experience.",
+            "generic": "Provide a brief summary of this document including its main purpose, key entities mentioned, and important information."
+        }
+        
+        prompt = summary_prompts.get(self.current_document_type, summary_prompts["generic"])
+        return self.ask_question(prompt, on_token=on_token)
+    
+    def is_document_loaded(self) -> bool:
+        """
+        Check if a document is currently loaded.
+        
+        Returns:
+            True if document is loaded, False otherwise
+        """
+        return self.current_document_text is not None
+    
+    def get_document_type(self) -> str:
+        """
+        Get the current document type.
+        
+        Returns:
+            Current document type
+        """
+        return self.current_document_type
+    
+    def _cached_analysis_result(self, pdf_data: Dict[str, any], document_type: str, timing: Dict[str, any]) -> Dict[str, any]:
+        """Build the analysis result for a document whose extraction came from a cache."""
+        return {
+            'success': True,
+            'cache_hit': True,
+            'pdf_data': pdf_data,
+            'llm_data': None,
+            'structured_data': self.current_document_data,
+            'answer_data': None,
+            'document_type': document_type,
+            'timing': timing
+        }
+    
+    def _file_cache_key(self, pdf_path: str, document_type: str, question: Optional[str] = None) -> Optional[str]:
+        """
+        Build the analysis cache key for a PDF file.
+        
+        The file is identified by its resolved path, modification time and
+        size, so a changed file is analyzed again without reading it first.
+        Like the extraction key, it also covers the prompt truncation, the
+        prompt version and the response format.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            document_type: Type of document (contract, resume, report, etc.)
+            question: Optional first question; with one, the extraction is a JSON object
+            
+        Returns:
+            Cache key, or None if the file cannot be accessed
+        """
+        try:
+            path = Path(pdf_path).resolve()
+            stat = path.stat()
+        except OSError:
+            return None
+        return DiskCache.make_key(
+            str(path), str(stat.st_mtime_ns), str(stat.st_size),
+            document_type, self.llm_client.model, str(settings.max_pdf_pages),
+            str(settings.max_prompt_tokens), EXTRACTION_PROMPT_VERSION, 'json' if question else 'text'
+        )
+    
+    def _get_cached_analysis(self, file_key: str) -> Optional[Dict[str, any]]:
+        """Look up an analysis in memory first, then on disk."""
+        cached = self._recent_analyses.get(file_key)
+        if cached is not None:
+            self._recent_analyses.move_to_end(file_key)
+            return cached
+        
+        cached = self.analysis_cache.get(file_key)
+        if cached is not None:
+            self._remember_analysis(file_key, cached)
+        return cached
+    
+    def _store_analysis(self, file_key: Optional[str], pdf_data: Dict[str, any]) -> None:
+        """Store the current document's analysis in memory and on disk."""
+        if file_key is None:
+            return
+        
+        analysis = {
+            'pdf_data': pdf_data,
+            'data': self.current_document_data,
+            'summary': self.current_document_summary,
+            'document_key': self.current_document_key
+        }
+        self._remember_analysis(file_key, analysis)
+        self.analysis_cache.set(file_key, analysis)
+    
+    def _remember_analysis(self, file_key: str, analysis: Dict[str, any]) -> None:
+        self._recent_analyses[file_key] = analysis
+        self._recent_analyses.move_to_end(file_key)
+        if len(self._recent_analyses) > ANALYSIS_MEMORY_CACHE_SIZE:
+            self._recent_analyses.popitem(last=False)
+    
+    def _question_context(self, question_embedding: Optional[np.ndarray] = None) -> str:
+        """
+        Get the document context sent with a question.
+        
+        Structured data is used if available. Otherwise the raw text is used,
+        narrowed down to the chunks most relevant to the question when its
+        embedding is given and the text is long enough.
+        
+        Args:
+            question_embedding: Optional normalized embedding of the question
+            
+        Returns:
+            Document context for the question
+        """
+        if self.current_document_data:
+            return self.current_document_data
+        if question_embedding is not None and self._uses_retrieval():
+            context = self._retrieve_chunks(question_embedding)
+            if context is not None:
+                return context
+        return self.current_document_text
+    
+    def _uses_retrieval(self) -> bool:
+        """Check whether questions are answered from retrieved chunks of the raw text."""
+        if self.current_document_data or not self.current_document_text or settings.rag_top_k <= 0:
+            return False
+        if self._chunks is None:
+            self._chunks = self.pdf_parser.chunk_text(self.current_document_text, settings.chunk_size)
+        return len(self._chunks) > settings.rag_top_k
+    
+    def _retrieve_chunks(self, question_embedding: np.ndarray) -> Optional[str]:
+        """
+        Select the chunks of the document text most similar to a question.
+        
+        Args:
+            question_embedding: Normalized embedding of the question
+            
+        Returns:
+            Up to settings.rag_top_k chunks, most relevant first, that fit in
+            settings.max_prompt_tokens together (the most relevant one is
+            always kept), or None if the chunks cannot be embedded
+        """
+        if self._chunk_embeddings is None:
+            # All chunks are embedded once per document, on the first question
+            embeddings = self.llm_client.embed_batch(self._chunks)
+            if embeddings is None:
+                return None
+            self._chunk_embeddings, self._chunk_scales = _quantize_embeddings(embeddings)
+            self._chunk_tokens = [count_tokens(chunk) for chunk in self._chunks]
+        
+        # Exact integer dot products, rescaled to cosine similarities
+        question_quantized, question_scale = _quantize_embeddings(question_embedding)
+        dots = np.matmul(self._chunk_embeddings, question_quantized, dtype=np.int32)
+        similarities = dots * (self._chunk_scales * question_scale)
+        
+        # A chunk that prompt truncation would cut off is left out instead
+        selected = []
+        budget = settings.max_prompt_tokens
+        for i in np.argsort(-similarities)[:settings.rag_top_k]:
+            if selected and self._chunk_tokens[i] > budget:
+                break
+            selected.append(self._chunks[i])
+            budget -= self._chunk_tokens[i]
+        return "\n\n".join(selected)
@@ -1,13 +1,275 @@
 """Local LLM client using Ollama."""
 
+import aiohttp
+import asyncio
+import atexit
+import httpx
+import numpy as np
 import ollama
-from typing import List, Dict, Optional
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 import logging
+import os
+import re
 import time
+from cache import DiskCache
+import fast_json
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Connection pool settings for the underlying httpx client. Keep-alive lets
+# the model check, extraction and every question reuse the same TCP
+# connection to the Ollama server, including after a pause in interactive
+# mode. Generation can legitimately take minutes, so only connecting is bounded.
+HTTP_LIMITS = httpx.Limits(
+    max_connections=settings.http_pool_size,
+    max_keepalive_connections=settings.http_pool_size,
+    keepalive_expiry=settings.http_keepalive
+)
+HTTP_TIMEOUT = httpx.Timeout(None, connect=10.0)
+
+# Punctuation ignored when comparing questions for the answer cache
+QUESTION_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+
+# Seconds a model availability check result is reused
+MODEL_CHECK_TTL = 60.0
+
+# Part of the extraction cache keys; bump it whenever the extraction prompts
+# or response formats change, so extractions cached for the old ones are not
+# replayed.
+EXTRACTION_PROMPT_VERSION = "1"
+
+# Extraction instructions per document type. They are static and live in the
+# system message; the document text goes last so the prompt prefix stays
+# identical across calls and Ollama can reuse its KV cache.
+EXTRACTION_SYSTEM_MESSAGES = {
+    "contract": """You are an expert contract analyst. Extract key contract information and return structured data.
+
+Analyze the contract document provided by the user and extract key information.
+Return a structured response with the following fields:
+
+- parties: Names/entities of all parties involved
+- contract_type: Type of contract (employment, service, lease, etc.)
+- effective_date: When the contract becomes effective
+- expiration_date: When the contract expires (if applicable)
+- key_terms: Important terms and conditions
+- payment_terms: Payment structure and amounts
+- obligations: Key obligations of each party
+- termination_conditions: How the contract can be terminated
+- governing_law: Applicable law/jurisdiction
+- summary: Brief overview of the contract
+
+Please provide a structured response focusing on the most important contract elements.
+""",
+    
+    "resume": """You are an expert resume parser. Extract key information and return structured data.
+
+Analyze the resume text provided by the user and extract key information.
+Return a structured response with the following fields:
+
+- name: Full name of the person
+- email: Email address if found
+- phone: Phone number if found
+- location: Current location/address
+- skills: List of technical and professional skills
+- experience: List of work experience with company, position, duration
+- education: Educational background
+- summary: Brief professional summary
+
+Please provide a structured response focusing on the most important information.
+""",
+    
+    "generic": """You are an expert document analyst. Extract key information from any document type and return structured data.
+
+Analyze the document provided by the user and extract key information.
+Return a structured response with the following fields:
+
+- document_type: What type of document this appears to be
+- key_entities: Important people, organizations, or entities mentioned
+- dates: Important dates mentioned
+- key_terms: Important terms, conditions, or concepts
+- financial_info: Any monetary amounts, costs, or financial terms
+- obligations: Any responsibilities or requirements mentioned
+- summary: Brief overview of the document content
+
+Please provide a structured response focusing on the most important information.
+"""
+}
+
+# Part of the answer cache keys; bump it whenever the question prompts
+# change, so answers cached for the old ones are not replayed.
+QUESTION_PROMPT_VERSION = "1"
+
+# Question-answering instructions per document type. The document comes
+# next and the question last, so repeated questions about the same document
+# share the prompt prefix.
+QUESTION_SYSTEM_MESSAGES = {
+    "contract": """You are a helpful assistant that answers questions about contracts based on the provided information.
+
+Provide a clear, concise answer based on the information available in the contract.
+If the information is not available, say "Information not found in the contract."
+""",
+    
+    "resume": """You are a helpful assistant that answers questions about resumes based on the provided information.
+
+IMPORTANT: Look carefully at the resume information. If the information is present in any form, provide the answer.
+
+For percentage/grade questions:
+- Look for any numerical values like "75%", "90%", "9.8 GPA", etc.
+- "BTech" typically refers to "Bachelor of Technology" or "Bachelor of Computer Science and Engineering"
+- "B.Tech", "BE", "Bachelor of Engineering", "Bachelor of Computer Science" are all equivalent to BTech
+
+For degree questions:
+- "Bachelor of Computer Science and Engineering" = BTech/BE
+- "Bachelor of Technology" = BTech
+- "Bachelor of Engineering" = BE
+
+Provide a clear, concise answer based on the information available in the resume.
+If the information is truly not available, say "Information not found in the resume."
+""",
+    
+    "generic": """You are a helpful assistant that answers questions about documents based on the provided information.
+
+Provide a clear, concise answer based on the information available in the document.
+If the information is not available, say "Information not found in the document."
+"""
+}
+
+# Appended to the extraction instructions when a single JSON-mode call has to
+# return the extracted fields, a summary and the answer to a first question.
+JSON_RESPONSE_INSTRUCTIONS = """
+Respond with a single JSON object with exactly these keys:
+- "extracted_fields": an object holding the fields listed above
+- "summary": a brief summary of the document as a string
+- "initial_answer": a clear, concise answer to the user's question as a string, or null if no question is asked
+"""
+
+# Ready-made system message dicts, built once so chat requests only add the
+# user message. The SDK and the raw chat path never modify them.
+EXTRACTION_SYSTEM_MSGS = {
+    document_type: {'role': 'system', 'content': content}
+    for document_type, content in EXTRACTION_SYSTEM_MESSAGES.items()
+}
+EXTRACT_AND_ANSWER_SYSTEM_MSGS = {
+    document_type: {'role': 'system', 'content': content + JSON_RESPONSE_INSTRUCTIONS}
+    for document_type, content in EXTRACTION_SYSTEM_MESSAGES.items()
+}
+QUESTION_SYSTEM_MSGS = {
+    document_type: {'role': 'system', 'content': content}
+    for document_type, content in QUESTION_SYSTEM_MESSAGES.items()
+}
+
+
+# Approximates the subword tokenizers of local models: runs of up to four word
+# characters, or a single punctuation mark, count as one token.
+TOKEN_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+
+
+def _split_template(template: str, *placeholders: str) -> Tuple[str, ...]:
+    """
+    Split a prompt template into the static parts around its placeholders.
+    
+    Args:
+        template: Prompt template
+        placeholders: Placeholders in the order they appear in the template
+        
+    Returns:
+        Static parts of the template, one more than the number of placeholders
+    """
+    parts = []
+    for placeholder in placeholders:
+        head, template = template.split(placeholder, 1)
+        parts.append(head)
+    parts.append(template)
+    return tuple(parts)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the approximate tokens of a text, as _truncate_tokens() counts them.
+    
+    Args:
+        text: Input text
+        
+    Returns:
+        Approximate number of tokens
+    """
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate text to an approximate token budget.
+    
+    Args:
+        text: Input text
+        max_tokens: Maximum number of tokens to keep
+        
+    Returns:
+        Leading part of the text containing at most max_tokens tokens
+    """
+    if max_tokens <= 0:
+        return ""
+    
+    for count, match in enumerate(TOKEN_PATTERN.finditer(text), 1):
+        if count == max_tokens:
+            return text[:match.end()]
+    return text
+
+
+# User prompts are split once at import, so building a prompt is plain
+# concatenation of the static parts with the dynamic text.
+EXTRACTION_PROMPT_PARTS = _split_template("Document text:\n{text_placeholder}", "{text_placeholder}")
+
+QUESTION_PROMPT_PARTS = {
+    document_type: _split_template(
+        f"{label}:\n{{document_placeholder}}\n\nQuestion: {{question_placeholder}}",
+        "{document_placeholder}", "{question_placeholder}"
+    )
+    for document_type, label in {
+        "contract": "Contract information",
+        "resume": "Resume information",
+        "generic": "Document information"
+    }.items()
+}
+
+
+def _normalize_document_type(document_type: str) -> str:
+    """
+    Map a document type to the key of its prompt templates.
+    
+    Args:
+        document_type: Type of document as given by the caller
+        
+    Returns:
+        Lower-cased document type, or "generic" if it has no templates of its own
+    """
+    document_type = document_type.lower()
+    return document_type if document_type in QUESTION_PROMPT_PARTS else "generic"
+
+
+@contextmanager
+def _timed(timing: Dict[str, float], key: str) -> Iterator[None]:
+    """
+    Record the duration of a block, in seconds, as timing[key].
+    
+    Nothing is measured unless settings.debug is enabled.
+    
+    Args:
+        timing: Dictionary receiving the measurement
+        key: Name of the measurement
+    """
+    if not settings.debug:
+        yield
+        return
+    
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        timing[key] = (time.perf_counter_ns() - start) / 1e9
+
 
 class LLMClient:
     """Client for interacting with local LLM via Ollama."""
@@ -15,7 +277,32 @@ class LLMClient:
     def __init__(self, model: str = None, host: str = None):
         self.model = model or settings.ollama_model
         self.host = host or settings.ollama_host
-        self.client = ollama.Client(host=self.host)
+        self.client = ollama.Client(host=self.host, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        self.base_url = self.host if "://" in self.host else f"http://{self.host}"
+        self.base_url = self.base_url.rstrip("/")
+        self._loop = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        self._model_check_cache: Optional[Tuple[float, bool]] = None
+        self.model_verified = False
+        self.embed_model = settings.ollama_embed_model
+        self.embeddings_available = True
+        # Cleared when the server predates the batch /api/embed endpoint
+        self.batch_embeddings_supported = True
+        # Set once the missing OLLAMA_NUM_PARALLEL was reported
+        self._num_parallel_warned = False
+        self.answer_cache = DiskCache(
+            os.path.join(settings.cache_dir, "answers"),
+            enabled=settings.cache_enabled, max_entries=settings.cache_max_entries
+        )
+        self.keep_alive = settings.ollama_keep_alive
+        # Keep the context size fixed across calls; a changing num_ctx makes
+        # Ollama reload the model and drop its prompt cache.
+        self.options = {'num_ctx': settings.ollama_num_ctx}
+        logger.debug(
+            "Ollama settings: keep_alive=%s, num_parallel=%d, max_loaded_models=%d",
+            self.keep_alive, settings.ollama_num_parallel, settings.ollama_max_loaded_models
+        )
     
     def extract_document_data(self, text: str, document_type: str = "generic") -> Dict[str, any]:
         """
@@ -27,296 +314,682 @@ class LLMClient:
             
         Returns:
             Dictionary with extracted document data and timing information
+            (timing is only collected when settings.debug is enabled)
         """
-        start_time = time.time()
+        timing = {}
         
-        # Define extraction patterns based on document type
-        extraction_patterns = {
-            "contract": """
-            Analyze the following contract document and extract key information. 
-            Return a structured response with the following fields:
-            
-            - parties: Names/entities of all parties involved
-            - contract_type: Type of contract (employment, service, lease, etc.)
-            - effective_date: When the contract becomes effective
-            - expiration_date: When the contract expires (if applicable)
-            - key_terms: Important terms and conditions
-            - payment_terms: Payment structure and amounts
-            - obligations: Key obligations of each party
-            - termination_conditions: How the contract can be terminated
-            - governing_law: Applicable law/jurisdiction
-            - summary: Brief overview of the contract
-            
-            Document text:
-            {text_placeholder}
-            
-            Please provide a structured response focusing on the most important contract elements.
-            """,
-            
-            "resume": """
-            Analyze the following resume text and extract key information. 
-            Return a structured response with the following fields:
-            
-            - name: Full name of the person
-            - email: Email address if found
-            - phone: Phone number if found
-            - location: Current location/address
-            - skills: List of technical and professional skills
-            - experience: List of work experience with company, position, duration
-            - education: Educational background
-            - summary: Brief professional summary
-            
-            Document text:
-            {text_placeholder}
-            
-            Please provide a structured response focusing on the most important information.
-            """,
+        with _timed(timing, 'total_extraction_time'):
+            # Format the prompt with the actual text content
+            text_part, end_part = EXTRACTION_PROMPT_PARTS
+            prompt = text_part + _truncate_tokens(text, settings.max_prompt_tokens) + end_part
+            
+            system_msg = EXTRACTION_SYSTEM_MSGS[_normalize_document_type(document_type)]
+            
+            try:
+                with _timed(timing, 'llm_request_time'):
+                    response = self.client.chat(
+                        model=self.model,
+                        messages=[system_msg, {'role': 'user', 'content': prompt}],
+                        options=self.options,
+                        keep_alive=self.keep_alive
+                    )
+                
+                content = response['message']['content']
+                self._add_extraction_details(timing, text, prompt, content)
+                
+                return {
+                    'success': True,
+                    'data': content,
+                    'model': self.model,
+                    'document_type': document_type,
+                    'timing': timing
+                }
+                
+            except Exception as e:
+                logger.error("Error extracting document data: %s", e)
+                self._add_extraction_details(timing, text, prompt, "")
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'data': None,
+                    'document_type': document_type,
+                    'timing': timing
+                }
+    
+    def extract_and_answer(self, text: str, document_type: str = "generic", question: Optional[str] = None) -> Dict[str, any]:
+        """
+        Extract structured data, a summary and an optional first answer in one call.
+        
+        Args:
+            text: Document text content
+            document_type: Type of document (contract, resume, report, etc.)
+            question: Optional question to answer in the same request
             
-            "generic": """
-            Analyze the following document and extract key information. 
-            Return a structured response with the following fields:
+        Returns:
+            Dictionary with extracted document data, summary, answer and timing information
+            (timing is only collected when settings.debug is enabled)
+        """
+        timing = {}
+        
+        with _timed(timing, 'total_extraction_time'):
+            # Format the prompt with the actual text content
+            text_part, end_part = EXTRACTION_PROMPT_PARTS
+            prompt = text_part + _truncate_tokens(text, settings.max_prompt_tokens) + end_part
+            
+            if question:
+                prompt += f"\n\nQuestion: {question}"
+            
+            system_msg = EXTRACT_AND_ANSWER_SYSTEM_MSGS[_normalize_document_type(document_type)]
+            
+            try:
+                with _timed(timing, 'llm_request_time'):
+                    response = self.client.chat(
+                        model=self.model,
+                        messages=[system_msg, {'role': 'user', 'content': prompt}],
+                        format='json',
+                        options=self.options,
+                        keep_alive=self.keep_alive
+                    )
+                
+                content = response['message']['content']
+                result = fast_json.loads(content)
+                if not isinstance(result, dict):
+                    raise ValueError("Expected a JSON object in the model response")
+                
+                answer = result.get('initial_answer')
+                self._add_extraction_details(timing, text, prompt, content)
+                
+                return {
+                    'success': True,
+                    'data': fast_json.dumps(result.get('extracted_fields') or {}, pretty=True).decode('utf-8'),
+                    'summary': result.get('summary') if isinstance(result.get('summary'), str) else None,
+                    'answer': answer if question and isinstance(answer, str) else None,
+                    'question': question,
+                    'model': self.model,
+                    'document_type': document_type,
+                    'timing': timing
+                }
+                
+            except Exception as e:
+                logger.error("Error extracting document data: %s", e)
+                self._add_extraction_details(timing, text, prompt, "")
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'data': None,
+                    'summary': None,
+                    'answer': None,
+                    'question': question,
+                    'document_type': document_type,
+                    'timing': timing
+                }
+    
+    def answer_question(self, question: str, document_data: str, document_type: str = "generic") -> Dict[str, any]:
+        """
+        Answer a question about any document.
+        
+        Args:
+            question: User's question
+            document_data: Document text or extracted data
+            document_type: Type of document (contract, resume, etc.)
             
-            - document_type: What type of document this appears to be
-            - key_entities: Important people, organizations, or entities mentioned
-            - dates: Important dates mentioned
-            - key_terms: Important terms, conditions, or concepts
-            - financial_info: Any monetary amounts, costs, or financial terms
-            - obligations: Any responsibilities or requirements mentioned
-            - summary: Brief overview of the document content
+        Returns:
+            Dictionary with answer and metadata including timing information
+            (timing is only collected when settings.debug is enabled)
+        """
+        timing = {}
+        
+        with _timed(timing, 'total_answer_time'):
+            prompt_type = _normalize_document_type(document_type)
+            messages = self._build_question_messages(question, document_data, prompt_type)
+            
+            cache_key = self._answer_cache_key(question, document_data, prompt_type)
+            cached = self.answer_cache.get(cache_key)
+            if cached is not None:
+                return self._cached_answer_result(question, document_data, document_type, messages, cached['answer'], timing)
+            
+            try:
+                with _timed(timing, 'llm_request_time'):
+                    response = self.client.chat(
+                        model=self.model,
+                        messages=messages,
+                        options=self.options,
+                        keep_alive=self.keep_alive
+                    )
+                
+                answer = response['message']['content']
+                self.answer_cache.set(cache_key, {'answer': answer})
+                
+                return self._answer_result(question, document_data, document_type, messages, answer, timing)
+                
+            except Exception as e:
+                logger.error("Error answering question: %s", e)
+                return self._answer_error(question, document_data, document_type, messages, e, timing)
+    
+    def answer_question_stream(self, question: str, document_data: str, document_type: str = "generic",
+                               on_token: Optional[Callable[[str], None]] = None) -> Dict[str, any]:
+        """
+        Answer a question about any document, streaming the answer as it is generated.
+        
+        Args:
+            question: User's question
+            document_data: Document text or extracted data
+            document_type: Type of document (contract, resume, etc.)
+            on_token: Called with each piece of the answer as soon as it arrives
             
-            Document text:
-            {text_placeholder}
+        Returns:
+            Dictionary with the full answer and metadata including timing information
+            (time_to_first_token is always measured, the rest only when settings.debug is enabled)
+        """
+        timing = {}
+        
+        with _timed(timing, 'total_answer_time'):
+            prompt_type = _normalize_document_type(document_type)
+            messages = self._build_question_messages(question, document_data, prompt_type)
+            
+            cache_key = self._answer_cache_key(question, document_data, prompt_type)
+            cached = self.answer_cache.get(cache_key)
+            if cached is not None:
+                if on_token:
+                    on_token(cached['answer'])
+                return self._cached_answer_result(question, document_data, document_type, messages, cached['answer'], timing)
+            
+            chunks = []
+            
+            try:
+                request_start = time.perf_counter_ns()
+                
+                with _timed(timing, 'llm_request_time'):
+                    stream = self.client.chat(
+                        model=self.model,
+                        messages=messages,
+                        stream=True,
+                        options=self.options,
+                        keep_alive=self.keep_alive
+                    )
+                    
+                    for part in stream:
+                        content = part['message']['content']
+                        if not content:
+                            continue
+                        if not chunks:
+                            timing['time_to_first_token'] = (time.perf_counter_ns() - request_start) / 1e9
+                        chunks.append(content)
+                        if on_token:
+                            on_token(content)
+                
+                answer = "".join(chunks)
+                self.answer_cache.set(cache_key, {'answer': answer})
+                
+                return self._answer_result(question, document_data, document_type, messages, answer, timing)
+                
+            except Exception as e:
+                logger.error("Error answering question: %s", e)
+                return self._answer_error(question, document_data, document_type, messages, e, timing)
+    
+    async def answer_question_async(self, question: str, document_data: str, document_type: str = "generic") -> Dict[str, any]:
+        """
+        Answer a question about any document without blocking the event loop.
+        
+        Args:
+            question: User's question
+            document_data: Document text or extracted data
+            document_type: Type of document (contract, resume, etc.)
             
-            Please provide a structured response focusing on the most important information.
-            """
-        }
+        Returns:
+            Dictionary with answer and metadata including timing information
+            (timing is only collected when settings.debug is enabled)
+        """
+        timing = {}
         
-        prompt_prep_start = time.time()
+        with _timed(timing, 'total_answer_time'):
+            prompt_type = _normalize_document_type(document_type)
+            messages = self._build_question_messages(question, document_data, prompt_type)
+            
+            cache_key = self._answer_cache_key(question, document_data, prompt_type)
+            cached = self.answer_cache.get(cache_key)
+            if cached is not None:
+                return self._cached_answer_result(question, document_data, document_type, messages, cached['answer'], timing)
+            
+            try:
+                with _timed(timing, 'llm_request_time'):
+                    answer = await self._raw_chat(messages)
+                
+                self.answer_cache.set(cache_key, {'answer': answer})
+                
+                return self._answer_result(question, document_data, document_type, messages, answer, timing)
+                
+            except Exception as e:
+                logger.error("Error answering question: %s", e)
+                return self._answer_error(question, document_data, document_type, messages, e, timing)
+    
+    async def answer_questions(self, questions: List[str], document_data: str, document_type: str = "generic") -> List[Dict[str, any]]:
+        """
+        Answer several questions about the same document concurrently.
         
-        # Get appropriate prompt based on document type
-        prompt_template = extraction_patterns.get(document_type.lower(), extraction_patterns["generic"])
+        The Ollama server only runs requests in parallel when it is started
+        with OLLAMA_NUM_PARALLEL; at most settings.ollama_num_parallel
+        requests are kept in flight.
         
-        # Format the prompt with the actual text content
-        if document_type.lower() == "contract":
-            prompt = prompt_template.replace("{text_placeholder}", text[:4000])
-        elif document_type.lower() == "resume":
-            prompt = prompt_template.replace("{text_placeholder}", text[:3000])
-        else:  # generic
-            prompt = prompt_template.replace("{text_placeholder}", text[:3500])
+        Args:
+            questions: User's questions
+            document_data: Document text or extracted data
+            document_type: Type of document (contract, resume, etc.)
+            
+        Returns:
+            List of answer dictionaries, in the same order as the questions
+        """
+        # Only batches rely on the server's parallelism, so only they warn
+        # when it is unknown
+        if len(questions) > 1 and not settings.ollama_num_parallel_set and not self._num_parallel_warned:
+            self._num_parallel_warned = True
+            logger.warning(
+                "OLLAMA_NUM_PARALLEL is not set; assuming the Ollama server handles %d parallel "
+                "requests. Start the server with OLLAMA_NUM_PARALLEL (and OLLAMA_MAX_LOADED_MODELS) "
+                "and export the same values here.",
+                settings.ollama_num_parallel
+            )
+        semaphore = asyncio.Semaphore(settings.ollama_num_parallel)
         
-        prompt_prep_end = time.time()
+        async def answer(question: str) -> Dict[str, any]:
+            async with semaphore:
+                return await self.answer_question_async(question, document_data, document_type)
         
-        # Define system messages based on document type
-        system_messages = {
-            "contract": "You are an expert contract analyst. Extract key contract information and return structured data.",
-            "resume": "You are an expert resume parser. Extract key information and return structured data.",
-            "generic": "You are an expert document analyst. Extract key information from any document type and return structured data."
-        }
+        return list(await asyncio.gather(*(answer(question) for question in questions)))
+    
+    def answer_questions_sync(self, questions: List[str], document_data: str, document_type: str = "generic") -> List[Dict[str, any]]:
+        """
+        Blocking wrapper around answer_questions().
         
-        system_message = system_messages.get(document_type.lower(), system_messages["generic"])
+        The coroutine runs on an event loop owned by this client, so pooled
+        connections of the async client stay usable between calls.
         
-        llm_request_start = time.time()
+        Args:
+            questions: User's questions
+            document_data: Document text or extracted data
+            document_type: Type of document (contract, resume, etc.)
+            
+        Returns:
+            List of answer dictionaries, in the same order as the questions
+        """
+        return self._run(self.answer_questions(questions, document_data, document_type))
+    
+    def warm_up(self, document_data: str, document_type: str = "generic") -> None:
+        """
+        Prefill the model's prompt cache with the shared prefix of question prompts.
+        
+        Question prompts start with the system message and the document, and
+        only the question at the end changes. Sending that prefix once, with
+        generation limited to a single token, lets Ollama reuse the processed
+        prefix for the first real question instead of evaluating the whole
+        document while the user waits.
+        
+        Args:
+            document_data: Document text or extracted data, as later passed with questions
+            document_type: Type of document (contract, resume, etc.)
+        """
+        prompt_type = _normalize_document_type(document_type)
+        document_part = QUESTION_PROMPT_PARTS[prompt_type][0]
+        prompt = document_part + _truncate_tokens(document_data, settings.max_prompt_tokens)
         
         try:
-            response = self.client.chat(
+            self.client.chat(
                 model=self.model,
-                messages=[
-                    {
-                        'role': 'system',
-                        'content': system_message
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }
-                ]
+                messages=[QUESTION_SYSTEM_MSGS[prompt_type], {'role': 'user', 'content': prompt}],
+                options={**self.options, 'num_predict': 1},
+                keep_alive=self.keep_alive
             )
-            
-            llm_request_end = time.time()
-            total_time = llm_request_end - start_time
-            
-            return {
-                'success': True,
-                'data': response['message']['content'],
-                'model': self.model,
-                'document_type': document_type,
-                'timing': {
-                    'total_extraction_time': total_time,
-                    'prompt_preparation_time': prompt_prep_end - prompt_prep_start,
-                    'llm_request_time': llm_request_end - llm_request_start,
-                    'text_length': len(text),
-                    'prompt_length': len(prompt),
-                    'response_length': len(response['message']['content']),
-                    'tokens_per_second': len(response['message']['content']) / (llm_request_end - llm_request_start) if (llm_request_end - llm_request_start) > 0 else 0
-                }
-            }
-            
+            logger.debug("Warmed up prompt cache for %s document", prompt_type)
         except Exception as e:
-            error_time = time.time()
-            total_time = error_time - start_time
-            
-            logger.error(f"Error extracting document data: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e),
-                'data': None,
-                'document_type': document_type,
-                'timing': {
-                    'total_extraction_time': total_time,
-                    'prompt_preparation_time': prompt_prep_end - prompt_prep_start,
-                    'llm_request_time': 0,
-                    'text_length': len(text),
-                    'prompt_length': len(prompt),
-                    'response_length': 0,
-                    'tokens_per_second': 0
-                }
-            }
+            logger.warning("Prompt cache warm-up failed: %s", e)
     
-    def answer_question(self, question: str, document_data: str, document_type: str = "generic") -> Dict[str, any]:
+    def embed(self, text: str) -> Optional[np.ndarray]:
         """
-        Answer a question about any document.
+        Compute the embedding of a text with the embedding model.
+        
+        Embeddings are switched off for the rest of the session after the
+        first failure (e.g. when the embedding model is not installed), so
+        callers only pay for one failed request.
         
         Args:
-            question: User's question
-            document_data: Document text or extracted data
-            document_type: Type of document (contract, resume, etc.)
+            text: Text to embed
             
         Returns:
-            Dictionary with answer and metadata including timing information
+            Unit-length float32 embedding, or None if embeddings are unavailable
         """
-        start_time = time.time()
+        if not self.embeddings_available:
+            return None
         
-        # Define context-aware prompts based on document type
-        context_prompts = {
-            "contract": f"""
-            Based on the following contract information, answer this question: "{question}"
-            
-            Contract information:
-            {document_data[:4000]}  # Limit context size
-            
-            Provide a clear, concise answer based on the information available in the contract.
-            If the information is not available, say "Information not found in the contract."
-            """,
-            
-            "resume": f"""
-            Based on the following resume information, answer this question: "{question}"
-            
-            Resume information:
-            {document_data[:4000]}  # Limit context size
-            
-            IMPORTANT: Look carefully at the structured data above. If the information is present in any form, provide the answer. 
-            
-            For percentage/grade questions:
-            - Look for any numerical values like "75%", "90%", "9.8 GPA", etc.
-            - "BTech" typically refers to "Bachelor of Technology" or "Bachelor of Computer Science and Engineering"
-            - "B.Tech", "BE", "Bachelor of Engineering", "Bachelor of Computer Science" are all equivalent to BTech
-            
-            For degree questions:
-            - "Bachelor of Computer Science and Engineering" = BTech/BE
-            - "Bachelor of Technology" = BTech
-            - "Bachelor of Engineering" = BE
-            
-            Provide a clear, concise answer based on the information available in the resume.
-            If the information is truly not available, say "Information not found in the resume."
-            """,
-            
-            "generic": f"""
-            Based on the following document information, answer this question: "{question}"
-            
-            Document information:
-            {document_data[:4000]}  # Limit context size
+        try:
+            response = self.client.embeddings(model=self.embed_model, prompt=text, keep_alive=self.keep_alive)
+            embedding = np.asarray(response['embedding'], dtype=np.float32)
+            norm = np.linalg.norm(embedding)
+            if norm == 0:
+                raise ValueError("Embedding model returned an empty embedding")
+            return embedding / norm
+        except Exception as e:
+            logger.warning("Embeddings disabled, embedding with '%s' failed: %s", self.embed_model, e)
+            self.embeddings_available = False
+            return None
+    
+    def embed_batch(self, texts: List[str]) -> Optional[np.ndarray]:
+        """
+        Compute the embeddings of several texts in one request.
+        
+        Servers without the batch /api/embed endpoint get one request per
+        text instead.
+        
+        Args:
+            texts: Texts to embed
             
-            Provide a clear, concise answer based on the information available in the document.
-            If the information is not available, say "Information not found in the document."
-            """
-        }
+        Returns:
+            C-contiguous float32 matrix with one unit-length embedding per row,
+            or None if embeddings are unavailable
+        """
+        if not self.embeddings_available:
+            return None
         
-        prompt_prep_start = time.time()
+        if self.batch_embeddings_supported:
+            try:
+                embeddings = np.asarray(self._run(self._raw_embed(texts)), dtype=np.float32)
+                norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+                if embeddings.shape[0] != len(texts) or not norms.all():
+                    raise ValueError("Embedding model returned missing or empty embeddings")
+                return np.ascontiguousarray(embeddings / norms)
+            except ollama.ResponseError as e:
+                if e.status_code != 404:
+                    logger.warning("Embeddings disabled, embedding with '%s' failed: %s", self.embed_model, e)
+                    self.embeddings_available = False
+                    return None
+                # Older servers only have /api/embeddings; a missing model
+                # also answers 404 and is reported by the fallback below
+                logger.debug("Batch embeddings not supported by the server: %s", e)
+                self.batch_embeddings_supported = False
+            except Exception as e:
+                logger.warning("Embeddings disabled, embedding with '%s' failed: %s", self.embed_model, e)
+                self.embeddings_available = False
+                return None
         
-        prompt = context_prompts.get(document_type.lower(), context_prompts["generic"])
+        embeddings = []
+        for text in texts:
+            embedding = self.embed(text)
+            if embedding is None:
+                return None
+            embeddings.append(embedding)
+        return np.stack(embeddings)
+    
+    def _run(self, coroutine):
+        """Run a coroutine on the event loop owned by this client."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coroutine)
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the aiohttp session, creating it on first use.
         
-        prompt_prep_end = time.time()
+        The session is bound to the event loop it was created on, so it is
+        recreated when called from a different loop.
         
-        # Define system messages based on document type
-        system_messages = {
-            "contract": "You are a helpful assistant that answers questions about contracts based on the provided information.",
-            "resume": "You are a helpful assistant that answers questions about resumes based on the provided information.",
-            "generic": "You are a helpful assistant that answers questions about documents based on the provided information."
-        }
+        Returns:
+            Shared aiohttp session for requests to the Ollama server
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session_loop = loop
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=settings.http_pool_size,
+                    keepalive_timeout=settings.http_keepalive
+                ),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=10.0)
+            )
+        return self._session
+    
+    async def _raw_chat(self, messages: List[Dict[str, str]]) -> str:
+        """
+        Send a non-streaming chat request straight to the Ollama HTTP API.
         
-        system_message = system_messages.get(document_type.lower(), system_messages["generic"])
+        This skips the ollama SDK on the concurrent path; the SDK is still
+        used for streaming and utility calls.
         
-        llm_request_start = time.time()
+        Args:
+            messages: Chat messages
+            
+        Returns:
+            Content of the model's reply
+        """
+        data = await self._post_json("/api/chat", {
+            'model': self.model,
+            'messages': messages,
+            'stream': False,
+            'options': self.options,
+            'keep_alive': self.keep_alive
+        })
+        return data['message']['content']
+    
+    async def _raw_embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several texts with a single request to the Ollama /api/embed endpoint.
         
-        try:
-            response = self.client.chat(
-                model=self.model,
-                messages=[
-                    {
-                        'role': 'system',
-                        'content': system_message
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }
-                ]
-            )
+        Args:
+            texts: Texts to embed
             
-            llm_request_end = time.time()
-            total_time = llm_request_end - start_time
+        Returns:
+            One embedding per text, in order
+        """
+        data = await self._post_json("/api/embed", {
+            'model': self.embed_model,
+            'input': texts,
+            'keep_alive': self.keep_alive
+        })
+        return data['embeddings']
+    
+    async def _post_json(self, path: str, payload: Dict[str, any]) -> Dict[str, any]:
+        """
+        POST a JSON payload to the Ollama HTTP API.
+        
+        Args:
+            path: API path, e.g. "/api/chat"
+            payload: Request body
             
-            return {
-                'success': True,
-                'answer': response['message']['content'],
-                'question': question,
-                'model': self.model,
-                'document_type': document_type,
-                'timing': {
-                    'total_answer_time': total_time,
-                    'prompt_preparation_time': prompt_prep_end - prompt_prep_start,
-                    'llm_request_time': llm_request_end - llm_request_start,
-                    'question_length': len(question),
-                    'context_length': len(document_data),
-                    'prompt_length': len(prompt),
-                    'answer_length': len(response['message']['content']),
-                    'tokens_per_second': len(response['message']['content']) / (llm_request_end - llm_request_start) if (llm_request_end - llm_request_start) > 0 else 0
-                }
-            }
+        Returns:
+            Decoded JSON response
+        """
+        session = await self._get_session()
+        async with session.post(
+            f"{self.base_url}{path}",
+            data=fast_json.dumps(payload),
+            headers={'Content-Type': 'application/json'}
+        ) as response:
+            body = await response.read()
+            if response.status >= 400:
+                raise ollama.ResponseError(body.decode('utf-8', errors='replace'), response.status)
+        return fast_json.loads(body)
+    
+    def close(self) -> None:
+        """Close the aiohttp session and the event loop owned by this client."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        if self._session is not None and self._session_loop is self._loop and not self._session.closed:
+            self._loop.run_until_complete(self._session.close())
+        self._session = None
+        self._session_loop = None
+        self._loop.close()
+        self._loop = None
+    
+    def _build_question_messages(self, question: str, document_data: str, prompt_type: str) -> List[Dict[str, str]]:
+        """
+        Build the chat messages for a question about a document.
+        
+        Args:
+            question: User's question
+            document_data: Document text or extracted data
+            prompt_type: Normalized document type from _normalize_document_type()
             
-        except Exception as e:
-            error_time = time.time()
-            total_time = error_time - start_time
+        Returns:
+            System and user messages for the chat request
+        """
+        document_part, question_part, end_part = QUESTION_PROMPT_PARTS[prompt_type]
+        prompt = document_part + _truncate_tokens(document_data, settings.max_prompt_tokens) + question_part + question + end_part
+        
+        system_msg = QUESTION_SYSTEM_MSGS[prompt_type]
+        
+        return [system_msg, {'role': 'user', 'content': prompt}]
+    
+    def cache_answer(self, question: str, document_data: str, document_type: str, answer: str) -> None:
+        """
+        Store an answer obtained outside the question methods in the answer cache.
+        
+        Used for the answer returned along with the extraction, so asking the
+        same question about the same context later is served from the cache.
+        
+        Args:
+            question: User's question
+            document_data: Document context later passed with the question
+            document_type: Type of document (contract, resume, etc.)
+            answer: Answer to the question
+        """
+        cache_key = self._answer_cache_key(question, document_data, _normalize_document_type(document_type))
+        self.answer_cache.set(cache_key, {'answer': answer})
+    
+    def _answer_cache_key(self, question: str, document_data: str, prompt_type: str) -> str:
+        """
+        Build the answer cache key for a question about a document.
+        
+        Questions are compared case-insensitively, ignoring punctuation and
+        extra whitespace, so trivially rephrased repeats hit the cache. The
+        key also covers the prompt truncation and the prompt version.
+        
+        Args:
+            question: User's question
+            document_data: Document text or extracted data
+            prompt_type: Normalized document type from _normalize_document_type()
             
-            logger.error(f"Error answering question: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e),
-                'answer': None,
-                'document_type': document_type,
-                'timing': {
-                    'total_answer_time': total_time,
-                    'prompt_preparation_time': prompt_prep_end - prompt_prep_start,
-                    'llm_request_time': 0,
-                    'question_length': len(question),
-                    'context_length': len(document_data),
-                    'prompt_length': len(prompt),
-                    'answer_length': 0,
-                    'tokens_per_second': 0
-                }
-            }
+        Returns:
+            Cache key
+        """
+        normalized_question = " ".join(QUESTION_PUNCTUATION_PATTERN.sub(" ", question.lower()).split())
+        return DiskCache.make_key(
+            self.model, prompt_type, normalized_question, document_data,
+            str(settings.max_prompt_tokens), QUESTION_PROMPT_VERSION
+        )
+    
+    def _cached_answer_result(self, question: str, document_data: str, document_type: str, messages: List[Dict[str, str]],
+                              answer: str, timing: Dict[str, float]) -> Dict[str, any]:
+        """Build the result dictionary for an answer served from the cache."""
+        logger.info("Answer served from cache")
+        if settings.debug:
+            timing['llm_request_time'] = 0
+        result = self._answer_result(question, document_data, document_type, messages, answer, timing)
+        result['cache_hit'] = True
+        return result
+    
+    def _answer_result(self, question: str, document_data: str, document_type: str, messages: List[Dict[str, str]],
+                       answer: str, timing: Dict[str, float]) -> Dict[str, any]:
+        """Build the result dictionary for a successfully answered question."""
+        self._add_answer_details(timing, question, document_data, messages, answer)
+        return {
+            'success': True,
+            'answer': answer,
+            'question': question,
+            'model': self.model,
+            'document_type': document_type,
+            'timing': timing
+        }
+    
+    def _answer_error(self, question: str, document_data: str, document_type: str, messages: List[Dict[str, str]],
+                      error: Exception, timing: Dict[str, float]) -> Dict[str, any]:
+        """Build the result dictionary for a question that could not be answered."""
+        self._add_answer_details(timing, question, document_data, messages, "")
+        return {
+            'success': False,
+            'error': str(error),
+            'answer': None,
+            'document_type': document_type,
+            'timing': timing
+        }
+    
+    @staticmethod
+    def _add_answer_details(timing: Dict[str, float], question: str, document_data: str,
+                            messages: List[Dict[str, str]], answer: str) -> None:
+        """Add size and throughput figures for a question to the timing dict when debugging."""
+        if not settings.debug:
+            return
+        llm_request_time = timing.get('llm_request_time', 0)
+        timing.update({
+            'question_length': len(question),
+            'context_length': len(document_data),
+            'prompt_length': len(messages[-1]['content']),
+            'answer_length': len(answer),
+            'tokens_per_second': len(answer) / llm_request_time if llm_request_time > 0 else 0
+        })
+    
+    @staticmethod
+    def _add_extraction_details(timing: Dict[str, float], text: str, prompt: str, response: str) -> None:
+        """Add size and throughput figures for an extraction to the timing dict when debugging."""
+        if not settings.debug:
+            return
+        llm_request_time = timing.get('llm_request_time', 0)
+        timing.update({
+            'text_length': len(text),
+            'prompt_length': len(prompt),
+            'response_length': len(response),
+            'tokens_per_second': len(response) / llm_request_time if llm_request_time > 0 else 0
+        })
     
     def check_model_availability(self) -> bool:
         """
         Check if the specified model is available.
         
+        The result is cached for MODEL_CHECK_TTL seconds to avoid repeated
+        round-trips to the Ollama server.
+        
         Returns:
             True if model is available, False otherwise
         """
+        if self._model_check_cache is not None:
+            checked_at, available = self._model_check_cache
+            if time.monotonic() - checked_at < MODEL_CHECK_TTL:
+                return available
+        
         try:
             models = self.client.list()
-            available_models = [model['name'] for model in models['models']]
-            return self.model in available_models
+            available_models = frozenset(model['name'] for model in models['models'])
+            available = self.model in available_models
         except Exception as e:
-            logger.error(f"Error checking model availability: {str(e)}")
+            logger.error("Error checking model availability: %s", e)
             return False
+        
+        self._model_check_cache = (time.monotonic(), available)
+        return available
+    
+    def verify_model(self) -> bool:
+        """
+        Check once that the model is available, so later operations can skip the check.
+        
+        Returns:
+            True if model is available (or SKIP_MODEL_CHECK is set), False otherwise
+        """
+        if settings.skip_model_check:
+            self.model_verified = True
+        else:
+            self.model_verified = self.check_model_availability()
+        return self.model_verified
+
+
+_llm_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """
+    Get the process-wide LLM client.
+    
+    Returns:
+        Shared LLMClient instance, so all callers reuse one connection pool
+    """
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient()
+        atexit.register(_llm_client.close)
+    return _llm_client
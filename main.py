@@ -1,25 +1,30 @@
 """Main CLI interface for the PDF Document Analyzer."""
 
-import click
+import argparse
 import logging
+import sys
+import time
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 from rich.console import Console
 from rich.panel import Panel
-from rich.text import Text
-from rich.prompt import Prompt
-from rich.table import Table
-from rich.columns import Columns
 
-from resume_analyzer import DocumentAnalyzer
 from config import settings
 
-# Setup logging
-logging.basicConfig(
-    level=getattr(logging, settings.log_level),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# The analyzer pulls in the LLM and PDF libraries; it is imported only once a
+# command actually needs it, so --help and argument errors return quickly.
+if TYPE_CHECKING:
+    from document_analyzer import DocumentAnalyzer
+
+# Setup logging, unless the embedding application already configured it
+if not logging.getLogger().handlers:
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
 
-console = Console()
+console = Console(highlight=False)
 
 
 def format_time(seconds: float) -> str:
@@ -34,81 +39,85 @@ def format_time(seconds: float) -> str:
         return f"{minutes}m {secs:.1f}s"
 
 
+# Timing rows shown when present, in display order: (key, label)
+TIMING_ROWS = (
+    ('pdf_extraction_time', "PDF Extraction"),
+    ('llm_extraction_time', "LLM Data Extraction"),
+    ('model_check_time', "Model Check"),
+    ('total_analysis_time', "Document Processing"),  # PDF + LLM; the model is checked before
+)
+
+
 def display_timing_info(timing_data: dict, title: str = "Performance Analysis"):
     """Display simplified timing information."""
     if not timing_data:
         return
     
-    console.print(f"\n[bold cyan]{title}[/bold cyan]")
+    from rich.table import Table
     
-    # Create simple timing table
-    timing_table = Table(show_header=True, header_style="bold magenta")
-    timing_table.add_column("Operation", style="cyan", no_wrap=True)
-    timing_table.add_column("Time", justify="right", style="green")
+    console.print(f"\n[bold cyan]{title}[/bold cyan]")
     
-    # PDF extraction time
-    if 'pdf_extraction_time' in timing_data:
-        timing_table.add_row(
-            "PDF Extraction",
-            f"{timing_data['pdf_extraction_time']:.3f}s"
-        )
+    rows = [(label, timing_data[key]) for key, label in TIMING_ROWS if key in timing_data]
     
-    # LLM data extraction time
-    if 'llm_extraction_time' in timing_data:
-        timing_table.add_row(
-            "LLM Data Extraction", 
-            f"{timing_data['llm_extraction_time']:.3f}s"
-        )
+    # Question answering time; an answer returned with the extraction took
+    # the time of the extraction request
+    answered_with_extraction = timing_data.get('answered_with_extraction', False)
+    question_time = timing_data.get('total_question_time', timing_data.get('total_answer_time', 0))
+    if 'total_question_time' in timing_data or 'total_answer_time' in timing_data:
+        rows.append(("Question Answering (with extraction)" if answered_with_extraction else "Question Answering",
+                     question_time))
     
-    # Model check time
-    if 'model_check_time' in timing_data:
-        timing_table.add_row(
-            "Model Check",
-            f"{timing_data['model_check_time']:.3f}s"
-        )
+    # Time until the first streamed token arrived
+    if 'time_to_first_token' in timing_data:
+        rows.append(("Time to First Token", timing_data['time_to_first_token']))
     
-    # Document processing time (PDF + LLM + Model Check)
-    if 'total_analysis_time' in timing_data:
-        timing_table.add_row(
-            "Document Processing",
-            f"{timing_data['total_analysis_time']:.3f}s"
-        )
+    # Total processing time (Document Processing + Question Answering, unless
+    # the answer came with the extraction and is already included)
+    if 'total_analysis_time' in timing_data and question_time > 0:
+        total_time = timing_data['total_analysis_time']
+        if not answered_with_extraction:
+            total_time += question_time
+        rows.append(("Total Processing", total_time))
     
-    # Question answering time
-    question_time = 0
-    if 'total_question_time' in timing_data:
-        question_time = timing_data['total_question_time']
-        timing_table.add_row(
-            "Question Answering",
-            f"{question_time:.3f}s"
-        )
-    elif 'total_answer_time' in timing_data:
-        question_time = timing_data['total_answer_time']
-        timing_table.add_row(
-            "Question Answering",
-            f"{question_time:.3f}s"
-        )
+    # Create simple timing table
+    timing_table = Table(show_header=True, header_style="bold magenta")
+    timing_table.add_column("Operation", style="cyan", no_wrap=True)
+    timing_table.add_column("Time", justify="right", style="green")
     
-    # Total processing time (Document Processing + Question Answering)
-    if 'total_analysis_time' in timing_data and question_time > 0:
-        total_time = timing_data['total_analysis_time'] + question_time
-        timing_table.add_row(
-            "Total Processing",
-            f"{total_time:.3f}s"
-        )
+    for label, seconds in rows:
+        timing_table.add_row(label, format_time(seconds))
     
     console.print(timing_table)
 
 
-@click.command()
-@click.option('--pdf', '-p', help='Path to PDF document file')
-@click.option('--type', '-t', 'document_type', 
-              type=click.Choice(['contract', 'resume', 'report', 'generic'], case_sensitive=False),
-              default='generic', help='Type of document (contract, resume, report, generic)')
-@click.option('--interactive', '-i', is_flag=True, help='Start interactive mode')
-@click.option('--question', '-q', help='Ask a specific question about the document')
-def main(pdf: str, document_type: str, interactive: bool, question: str):
+@lru_cache(maxsize=1)
+def get_analyzer() -> "DocumentAnalyzer":
+    """Create the analyzer once per process, so repeated runs share its caches."""
+    from document_analyzer import DocumentAnalyzer
+    
+    return DocumentAnalyzer()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="PDF Document Analyzer - Privacy-focused local analysis.")
+    parser.add_argument('--pdf', '-p', help='Path to PDF document file')
+    parser.add_argument('--type', '-t', dest='document_type', type=str.lower,
+                        choices=['contract', 'resume', 'report', 'generic'],
+                        default='generic', help='Type of document (contract, resume, report, generic)')
+    parser.add_argument('--interactive', '-i', action='store_true', help='Start interactive mode')
+    parser.add_argument('--question', '-q', help='Ask a specific question about the document')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """PDF Document Analyzer - Privacy-focused local analysis."""
+    args = parse_args(argv)
+    return run(args.pdf, args.document_type, args.interactive, args.question)
+
+
+def run(pdf: str, document_type: str, interactive: bool, question: str) -> bool:
+    """Analyze a document and/or start interactive mode; returns False if anything failed."""
     
     console.print(Panel.fit(
         "[bold blue]PDF Document Analyzer[/bold blue]\n"
@@ -116,18 +125,37 @@ def main(pdf: str, document_type: str, interactive: bool, question: str):
         border_style="blue"
     ))
     
-    analyzer = DocumentAnalyzer()
+    if not (pdf or interactive):
+        console.print("[yellow]Use --help to see available options[/yellow]")
+        console.print("\n[bold]Quick start:[/bold]")
+        console.print("  python main.py --pdf document.pdf --type contract --interactive")
+        console.print("  python main.py --pdf resume.pdf --type resume --question 'What are their skills?'")
+        return True
+    
+    if pdf and not Path(pdf).exists():
+        console.print(f"[red]Error: PDF file not found: {pdf}[/red]")
+        return False
+    
+    analyzer = get_analyzer()
+    
+    # Check the model once up front; later operations skip the check
+    model_check_start = time.perf_counter()
+    model_available = analyzer.llm_client.verify_model()
+    model_check_time = time.perf_counter() - model_check_start
+    if not model_available:
+        console.print(f"[red]Error: LLM model '{settings.ollama_model}' not available. "
+                      f"Please install it with: ollama pull {settings.ollama_model}[/red]")
+        sys.exit(2)
     
     # If PDF is provided, analyze it
     if pdf:
         pdf_path = Path(pdf)
-        if not pdf_path.exists():
-            console.print(f"[red]Error: PDF file not found: {pdf}[/red]")
-            return
-        
         console.print(f"[yellow]Analyzing {document_type} document: {pdf_path.name}[/yellow]")
         
-        result = analyzer.analyze_document(str(pdf_path), document_type)
+        result = analyzer.analyze_document(str(pdf_path), document_type, question)
+        success = result['success']
+        # The analysis skipped its own model check after the one above
+        result.setdefault('timing', {})['model_check_time'] = model_check_time
         
         if result['success']:
             console.print(f"[green]✓ {document_type.title()} document analysis completed successfully![/green]")
@@ -137,6 +165,8 @@ def main(pdf: str, document_type: str, interactive: bool, question: str):
             console.print(f"[dim]Pages processed: {pdf_data['page_count']}[/dim]")
             console.print(f"[dim]File size: {pdf_data['file_size']:,} bytes[/dim]")
             console.print(f"[dim]Document type: {document_type}[/dim]")
+            if result.get('cache_hit'):
+                console.print("[green]cache hit[/green] [dim](extraction reused from an earlier run)[/dim]")
             
             # Show structured data if available
             if result.get('structured_data'):
@@ -146,7 +176,9 @@ def main(pdf: str, document_type: str, interactive: bool, question: str):
             # Ask specific question if provided
             if question:
                 console.print(f"\n[yellow]Answering: {question}[/yellow]")
-                answer_result = analyzer.ask_question(question)
+                # The answer normally arrives with the extraction; fall back
+                # to a separate request if the model did not provide one
+                answer_result = result.get('answer_data') or analyzer.ask_question(question)
                 
                 if answer_result['success']:
                     console.print(Panel(answer_result['answer'], title="Answer"))
@@ -160,32 +192,70 @@ def main(pdf: str, document_type: str, interactive: bool, question: str):
                     display_timing_info(combined_timing, "Document Analysis Performance")
                 else:
                     console.print(f"[red]Error: {answer_result['error']}[/red]")
+                    success = False
             else:
                 # Show timing even when no question is asked
                 if 'timing' in result:
                     display_timing_info(result['timing'], "Document Analysis Performance")
             
-            # Start interactive mode if requested
+            # Start interactive mode if requested, prefilling the model's
+            # prompt cache with the document while the user types
             if interactive:
+                analyzer.warm_up()
                 start_interactive_mode(analyzer)
         else:
             console.print(f"[red]Error analyzing document: {result['error']}[/red]")
-            return
+        return success
     
     # Interactive mode without PDF
-    elif interactive:
-        start_interactive_mode(analyzer)
+    start_interactive_mode(analyzer)
+    return True
+
+
+class StreamingMarkdown:
+    """Renderable that shows the text streamed so far as Markdown."""
     
-    else:
-        console.print("[yellow]Use --help to see available options[/yellow]")
-        console.print("\n[bold]Quick start:[/bold]")
-        console.print("  python main.py --pdf document.pdf --type contract --interactive")
-        console.print("  python main.py --pdf resume.pdf --type resume --question 'What are their skills?'")
+    def __init__(self):
+        self.parts = []
+    
+    def append(self, token: str):
+        self.parts.append(token)
+    
+    def __rich_console__(self, console, options):
+        from rich.markdown import Markdown
+        
+        # Parsed only when Live refreshes, not once per token
+        yield Markdown("".join(self.parts))
+
+
+def stream_answer(ask, title: str) -> dict:
+    """
+    Run a question while rendering its answer live as it streams in.
+    
+    Args:
+        ask: Function taking an on_token callback and returning the result dictionary
+        title: Title of the answer panel
+        
+    Returns:
+        Result dictionary from ask
+    """
+    from rich.live import Live
+    from rich.markdown import Markdown
+    
+    answer = StreamingMarkdown()
+    with Live(Panel(answer, title=title), console=console, transient=True):
+        result = ask(answer.append)
+    
+    if result['success']:
+        console.print(Panel(Markdown(result['answer']), title=title))
+    return result
 
 
-def start_interactive_mode(analyzer: DocumentAnalyzer):
+def start_interactive_mode(analyzer: "DocumentAnalyzer"):
     """Start interactive question-answering mode."""
     
+    from rich.prompt import Prompt
+    
     console.print("\n[bold green]Interactive Mode[/bold green]")
     console.print("[dim]Type 'quit' or 'exit' to stop. Type 'help' for commands.[/dim]")
     
@@ -205,12 +275,11 @@ def start_interactive_mode(analyzer: DocumentAnalyzer):
             if user_input.lower() == 'summary':
                 if analyzer.is_document_loaded():
                     console.print("[yellow]Generating summary...[/yellow]")
-                    summary_result = analyzer.get_document_summary()
+                    doc_type = analyzer.get_document_type()
+                    summary_result = stream_answer(analyzer.get_document_summary,
+                                                   f"{doc_type.title()} Summary")
                     
-                    if summary_result['success']:
-                        doc_type = analyzer.get_document_type()
-                        console.print(Panel(summary_result['answer'], title=f"{doc_type.title()} Summary"))
-                    else:
+                    if not summary_result['success']:
                         console.print(f"[red]Error: {summary_result['error']}[/red]")
                 else:
                     console.print("[red]No document loaded. Please analyze a document first.[/red]")
@@ -225,13 +294,12 @@ def start_interactive_mode(analyzer: DocumentAnalyzer):
                 console.print("[dim]Usage: python main.py --pdf document.pdf --type contract --interactive[/dim]")
                 continue
             
-            # Answer the question
+            # Answer the question, rendering the answer as it streams in
             console.print("[yellow]Thinking...[/yellow]")
-            result = analyzer.ask_question(user_input)
+            result = stream_answer(lambda on_token: analyzer.ask_question(user_input, on_token=on_token),
+                                   "Answer")
             
             if result['success']:
-                console.print(Panel(result['answer'], title="Answer"))
-                
                 # Display timing for interactive questions
                 if 'timing' in result:
                     display_timing_info(result['timing'], "Question Performance")
@@ -310,4 +378,4 @@ def show_help(document_type: str = "generic"):
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,58 @@
+"""In-memory cache of answers looked up by question similarity."""
+
+from collections import OrderedDict
+from typing import Optional, Tuple
+import numpy as np
+
+
+class SemanticCache:
+    """Returns an earlier answer when a new question about the same document means the same thing."""
+    
+    def __init__(self, threshold: float = 0.92, max_entries: int = 256):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # (document key, question) -> (normalized embedding, answer), oldest first
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, str]]" = OrderedDict()
+    
+    def lookup(self, document_key: str, embedding: np.ndarray) -> Optional[Tuple[str, str, float]]:
+        """
+        Find the cached answer to the most similar question about a document.
+        
+        Args:
+            document_key: Key of the document the question is about
+            embedding: Normalized embedding of the question
+            
+        Returns:
+            Tuple of (cached question, answer, cosine similarity), or None if no
+            cached question reaches the similarity threshold
+        """
+        keys = [key for key in self._entries if key[0] == document_key]
+        if not keys:
+            return None
+        
+        # Embeddings are normalized, so the dot product is the cosine similarity
+        similarities = np.stack([self._entries[key][0] for key in keys]) @ embedding
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        if similarity < self.threshold:
+            return None
+        
+        key = keys[best]
+        self._entries.move_to_end(key)
+        return key[1], self._entries[key][1], similarity
+    
+    def add(self, document_key: str, question: str, embedding: np.ndarray, answer: str) -> None:
+        """
+        Cache the answer to a question, evicting the least recently used entry when full.
+        
+        Args:
+            document_key: Key of the document the question is about
+            question: User's question
+            embedding: Normalized embedding of the question
+            answer: Answer to cache
+        """
+        key = (document_key, question)
+        self._entries[key] = (embedding, answer)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -1,106 +1,453 @@
 """Test script for the PDF Resume Analyzer system."""
 
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import selectors
+import shlex
+import signal
 import subprocess
 import sys
+import tempfile
+import time
+import traceback
+from collections import deque
+from contextlib import redirect_stderr, redirect_stdout
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 
+# Every path is anchored here, so the tests can be run from any directory
+PROJECT_DIR = Path(__file__).resolve().parent
+MAIN_PY = str(PROJECT_DIR / "main.py")
+RESUME = PROJECT_DIR / "resume.pdf"
+RESUME_PATH = str(RESUME)
 
-def run_test_command(command: str, description: str) -> bool:
-    """Run a test command and return success status."""
-    print(f"\n🧪 Testing: {description}")
-    print(f"Command: {command}")
-    print("-" * 60)
+# Interpreter the tests run under: the project's venv when there is one.
+# The path is not resolved, since resolving the venv's symlink would run
+# the base interpreter outside the venv.
+VENV_PY = PROJECT_DIR / "venv" / "bin" / "python3"
+VENV_PY = str(VENV_PY) if VENV_PY.exists() else sys.executable
+
+# Seconds a test may take: --help does no real work and should fail fast,
+# while anything that reaches the LLM can legitimately be slow
+HELP_TIMEOUT = 5
+LLM_TIMEOUT = 120
+
+# Test cases, with timeouts in seconds. Every --pdf case runs the LLM
+# extraction, with or without a question, so they share one deadline.
+# --help only loads main.py and config.py, so editing anything else
+# does not rerun it.
+TEST_CASES = [
+    {
+        "argv": [MAIN_PY, "--help"],
+        "description": "Help command functionality",
+        "timeout": HELP_TIMEOUT,
+        "inputs": ["main.py", "config.py"]
+    },
+    {
+        "argv": [MAIN_PY, "--pdf", RESUME_PATH],
+        "description": "Basic PDF analysis without questions",
+        "timeout": LLM_TIMEOUT
+    },
+    {
+        "argv": [MAIN_PY, "--pdf", RESUME_PATH, "--question", "What is this person's name?"],
+        "description": "Simple name extraction question",
+        "timeout": LLM_TIMEOUT
+    },
+    {
+        "argv": [MAIN_PY, "--pdf", RESUME_PATH, "--question", "What programming languages does this person know?"],
+        "description": "Technical skills question",
+        "timeout": LLM_TIMEOUT
+    },
+    {
+        "argv": [MAIN_PY, "--pdf", RESUME_PATH, "--question", "What is this person's educational background?"],
+        "description": "Education background question",
+        "timeout": LLM_TIMEOUT
+    },
+    {
+        "argv": [MAIN_PY, "--pdf", RESUME_PATH, "--question", "What projects has this person worked on?"],
+        "description": "Project experience question",
+        "timeout": LLM_TIMEOUT
+    }
+]
+
+# Bytes of each test's stdout and stderr kept for the report
+OUTPUT_TAIL_BYTES = 4096
+
+# Results of passing tests, reused until the command, the sample PDF or any
+# source file changes
+TEST_CACHE_DIR = PROJECT_DIR / ".test_cache"
+
+
+def _cache_key(command: List[str], inputs: Optional[List[str]] = None) -> str:
+    """
+    Hash a test command together with everything its result depends on.
     
+    inputs names the source files the command reads; by default that is
+    every source file and the sample PDF.
+    """
+    digest = hashlib.sha256(repr(command).encode())
+    if inputs is None:
+        digest.update(RESUME.read_bytes())
+        inputs = sorted(source.name for source in PROJECT_DIR.glob("*.py"))
+    for source in inputs:
+        digest.update(f"{source}:{(PROJECT_DIR / source).stat().st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def _load_cached_result(key: str) -> Optional[dict]:
+    """Load a cached test result, or None if there is none."""
     try:
-        result = subprocess.run(
-            command, 
-            shell=True, 
-            capture_output=True, 
-            text=True, 
-            timeout=120
+        return json.loads((TEST_CACHE_DIR / f"{key}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _store_cached_result(key: str, result: dict):
+    """Write a test result to the cache atomically."""
+    TEST_CACHE_DIR.mkdir(exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=TEST_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as file:
+        json.dump(result, file)
+    os.replace(temp_path, TEST_CACHE_DIR / f"{key}.json")
+
+
+@lru_cache(maxsize=1)
+def _child_env() -> Dict[str, str]:
+    """
+    Environment for test children, which start with -S to skip site.py.
+    
+    Their module search path is frozen into PYTHONPATH instead: this
+    interpreter's own when it is the venv's, otherwise asked from the venv's
+    interpreter once per run.
+    """
+    if VENV_PY == sys.executable or Path(VENV_PY).parent.parent.absolute() == Path(sys.prefix):
+        search_path = sys.path[1:]
+    else:
+        probe = subprocess.run(
+            [VENV_PY, "-c", "import sys; print('\\n'.join(sys.path[1:]))"],
+            capture_output=True, text=True, check=True
         )
+        search_path = probe.stdout.splitlines()
+    return {**os.environ, "PYTHONPATH": os.pathsep.join(entry for entry in search_path if entry)}
+
+
+def _start_subprocess(command: List[str]) -> subprocess.Popen:
+    """Start a test command with its output piped back unbuffered."""
+    # Python's own descriptors are not inheritable, so closing the rest in
+    # the child is skipped; the child leads its own process group so a
+    # timeout also kills the PDF worker processes it started
+    return subprocess.Popen(
+        command, 
+        stdout=subprocess.PIPE, 
+        stderr=subprocess.PIPE, 
+        bufsize=0,
+        env=_child_env(),
+        close_fds=False,
+        start_new_session=True
+    )
+
+
+def _run_subprocesses(pending: List[Tuple[int, List[str], int]], max_running: int) -> Iterator[Tuple[int, dict]]:
+    """
+    Run test processes, a few at a time, and collect their output from a
+    single loop.
+    
+    Output is consumed as it arrives and only its tail is kept, so memory
+    stays bounded however much the children print. A test's deadline counts
+    from the start of its own process, not from the time it waited for a
+    slot; a process past its deadline is killed along with its process group.
+    
+    Args:
+        pending: (test index, command, timeout in seconds), in start order
+        max_running: Most processes running at once
         
-        if result.returncode == 0:
-            print("✅ SUCCESS")
-            if result.stdout:
-                print("Output:")
-                print(result.stdout[-500:])  # Show last 500 chars
-            return True
-        else:
-            print("❌ FAILED")
-            print("Error:")
-            print(result.stderr)
-            return False
-            
-    except subprocess.TimeoutExpired:
-        print("⏰ TIMEOUT - Command took too long")
-        return False
-    except Exception as e:
-        print(f"💥 EXCEPTION: {e}")
-        return False
+    Yields:
+        (test index, result) as each test finishes, in completion order
+    """
+    pending = deque(pending)
+    selector = selectors.DefaultSelector()
+    running = {}
+    tails = {}
+    open_pipes = {}
+    
+    while pending or running:
+        while pending and len(running) < max_running:
+            index, command, timeout = pending.popleft()
+            try:
+                process = _start_subprocess(command)
+            except OSError as e:
+                yield index, {"exception": e}
+                continue
+            started = time.monotonic()
+            running[index] = (process, started, started + timeout)
+            tails[index] = (bytearray(), bytearray())
+            open_pipes[index] = 2
+            selector.register(process.stdout, selectors.EVENT_READ, (index, 0))
+            selector.register(process.stderr, selectors.EVENT_READ, (index, 1))
+        if not running:
+            break
+        
+        timeout = max(0.0, min(deadline for _, _, deadline in running.values()) - time.monotonic())
+        for key, _ in selector.select(timeout):
+            index, stream = key.data
+            data = os.read(key.fd, 65536)
+            if data:
+                tail = tails[index][stream]
+                tail += data
+                del tail[:-OUTPUT_TAIL_BYTES]
+            else:
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+                open_pipes[index] -= 1
+        
+        now = time.monotonic()
+        for index, (process, started, deadline) in list(running.items()):
+            if open_pipes[index] == 0:
+                stdout, stderr = (tail.decode("utf-8", "replace") for tail in tails[index])
+                result = {"returncode": process.wait(), "stdout_tail": stdout[-500:], "stderr": stderr}
+            elif now >= deadline:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+                for pipe in (process.stdout, process.stderr):
+                    if not pipe.closed:
+                        selector.unregister(pipe)
+                        pipe.close()
+                result = {"timed_out": True}
+            else:
+                continue
+            result["elapsed"] = now - started
+            del running[index]
+            yield index, result
+    selector.close()
 
 
-def main():
-    """Run comprehensive system tests."""
-    print("🚀 PDF Resume Analyzer - System Test Suite")
-    print("=" * 60)
+class InProcessTimeout(BaseException):
+    """
+    Raised by the timeout alarm in a test running in-process.
     
-    # Check if resume.pdf exists
-    if not Path("resume.pdf").exists():
-        print("❌ resume.pdf not found. Please ensure the sample resume is in the current directory.")
-        return False
+    It is not an Exception, so the broad "except Exception" handlers in the
+    code under test let it through.
+    """
+
+
+def _raise_timeout(signum, frame):
+    """SIGALRM handler that interrupts a test running in-process."""
+    raise InProcessTimeout
+
+
+def _run_in_process(argv: List[str], timeout: int) -> dict:
+    """
+    Run main.py's entry point in this interpreter as if it were a subprocess.
+    
+    Modules, the LLM client and its connections are reused across calls.
+    Must be called from the main thread, which receives the timeout alarm.
+    """
+    import main as cli
+    
+    stdout, stderr = io.StringIO(), io.StringIO()
     
-    # Test cases
-    test_cases = [
-        {
-            "command": "source venv/bin/activate && python3 main.py --help",
-            "description": "Help command functionality"
-        },
-        {
-            "command": "source venv/bin/activate && python3 main.py --pdf resume.pdf",
-            "description": "Basic PDF analysis without questions"
-        },
-        {
-            "command": "source venv/bin/activate && python3 main.py --pdf resume.pdf --question 'What is this person\\'s name?'",
-            "description": "Simple name extraction question"
-        },
-        {
-            "command": "source venv/bin/activate && python3 main.py --pdf resume.pdf --question 'What programming languages does this person know?'",
-            "description": "Technical skills question"
-        },
-        {
-            "command": "source venv/bin/activate && python3 main.py --pdf resume.pdf --question 'What is this person\\'s educational background?'",
-            "description": "Education background question"
-        },
-        {
-            "command": "source venv/bin/activate && python3 main.py --pdf resume.pdf --question 'What projects has this person worked on?'",
-            "description": "Project experience question"
-        }
+    # Importing main configured logging against the real stderr; its
+    # handlers write to the captured stream for the duration of the test
+    log_handlers = [
+        handler for handler in logging.getLogger().handlers
+        if type(handler) is logging.StreamHandler
     ]
+    log_streams = [handler.stream for handler in log_handlers]
+    for handler in log_handlers:
+        handler.setStream(stderr)
     
-    # Run tests
+    previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+    started = time.monotonic()
+    signal.alarm(timeout)
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                returncode = 0 if cli.main(argv[1:]) else 1
+            except SystemExit as e:
+                returncode = e.code if isinstance(e.code, int) else int(e.code is not None)
+            except Exception:
+                traceback.print_exc()
+                returncode = 1
+    except InProcessTimeout:
+        return {"timed_out": True, "elapsed": time.monotonic() - started}
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous_handler)
+        for handler, stream in zip(log_handlers, log_streams):
+            handler.setStream(stream)
+    
+    # A handler catching BaseException (or a bare except) in the code under
+    # test can still swallow the alarm; a run past its deadline is a timeout
+    # whatever it returned
+    elapsed = time.monotonic() - started
+    if elapsed >= timeout:
+        return {"timed_out": True, "elapsed": elapsed}
+    return {
+        "returncode": returncode,
+        "stdout_tail": stdout.getvalue()[-500:],
+        "stderr": stderr.getvalue(),
+        "elapsed": elapsed
+    }
+
+
+def report_test_result(description: str, command: str, key: str, result: dict, cached: bool = False,
+                       aliases: List[str] = ()) -> bool:
+    """Print a test's report in one piece, caching it if it passed; returns success status."""
+    report = io.StringIO()
+    print(f"\n🧪 Testing: {description}", file=report)
+    print(f"Command: {command}", file=report)
+    for alias in aliases:
+        print(f"Also counts for: {alias} (same command)", file=report)
+    print("-" * 60, file=report)
+    
+    if "exception" in result:
+        print(f"💥 EXCEPTION: {result['exception']}", file=report)
+        success = False
+    elif result.get("timed_out"):
+        print(f"⏰ TIMEOUT - Command took too long (killed after {result['elapsed']:.1f}s)", file=report)
+        success = False
+    elif result["returncode"] == 0:
+        print("✅ SUCCESS" + (" (cached)" if cached else f" ({result['elapsed']:.1f}s)"), file=report)
+        if result["stdout_tail"]:
+            print("Output:", file=report)
+            print(result["stdout_tail"], file=report)  # Show last 500 chars
+        if not cached:
+            # Only passes are cached; failures are often environmental
+            # (e.g. Ollama not running) and are always rerun
+            _store_cached_result(key, {name: value for name, value in result.items() if name != "elapsed"})
+        success = True
+    else:
+        print(f"❌ FAILED ({result['elapsed']:.1f}s)", file=report)
+        # main.py reports its own errors on stdout, tracebacks and logs go
+        # to stderr
+        if result["stdout_tail"]:
+            print("Output:", file=report)
+            print(result["stdout_tail"], file=report)  # Show last 500 chars
+        print("Error:", file=report)
+        print(result["stderr"], file=report)
+        success = False
+    
+    # One write per report rather than one per line
+    sys.stdout.write(report.getvalue())
+    sys.stdout.flush()
+    return success
+
+
+def run_tests(test_cases: List[dict], use_cache: bool = True, in_process: bool = False) -> int:
+    """Run test cases and return how many passed."""
     passed = 0
-    total = len(test_cases)
+    pending = []
+    commands = {}
+    
+    # Test cases with the same arguments run once and share the result
+    first_with_argv = {}
+    aliases = {}
+    for index, test_case in enumerate(test_cases):
+        first = first_with_argv.setdefault(tuple(test_case["argv"]), index)
+        aliases.setdefault(first, [])
+        if first != index:
+            aliases[first].append(test_case["description"])
+    
+    for index in aliases:
+        test_case = test_cases[index]
+        argv = test_case["argv"]
+        command = argv if in_process else [VENV_PY, "-S", *argv]
+        key = _cache_key(command, test_case.get("inputs"))
+        commands[index] = (shlex.join(command) + (" (in-process)" if in_process else ""), key)
+        
+        cached = _load_cached_result(key) if use_cache else None
+        if cached is not None:
+            result = cached
+        elif in_process:
+            # One interpreter for all tests, one test at a time
+            result = _run_in_process(argv, timeout=test_case["timeout"])
+        else:
+            # Run once the cache was checked for every test
+            pending.append((index, command, test_case["timeout"]))
+            continue
+        
+        if report_test_result(test_case["description"], *commands[index], result, cached is not None,
+                              aliases[index]):
+            passed += 1 + len(aliases[index])
+    
+    # The Ollama server only handles this many requests at once; tests
+    # beyond it would spend their deadline queued behind the others. Imported
+    # here, after main() has pointed CACHE_DIR at the test cache.
+    from config import settings
     
-    for test_case in test_cases:
-        if run_test_command(test_case["command"], test_case["description"]):
-            passed += 1
+    for index, result in _run_subprocesses(pending, max(1, settings.ollama_num_parallel)):
+        if report_test_result(test_cases[index]["description"], *commands[index], result,
+                              aliases=aliases[index]):
+            passed += 1 + len(aliases[index])
+    return passed
+
+
+def run_only(name: str):
+    """Replace this process with the single test whose description matches name."""
+    matches = [test_case for test_case in TEST_CASES if test_case["description"].lower() == name.lower()]
+    matches = matches or [test_case for test_case in TEST_CASES if name.lower() in test_case["description"].lower()]
+    if len(matches) != 1:
+        print(f"❌ --only must match exactly one test, but {len(matches)} match '{name}':")
+        for test_case in matches or TEST_CASES:
+            print(f"  {test_case['description']}")
+        sys.exit(2)
+    
+    # No supervisor, pipes or cache: the test's output and exit status are
+    # this process's own, and the app's caches are off so nothing stale is
+    # replayed
+    argv = matches[0]["argv"]
+    os.environ["ENABLE_CACHE"] = "false"
+    os.execv(VENV_PY, [VENV_PY, *argv])
+
+
+def main(use_cache: bool = True, in_process: bool = True):
+    """Run comprehensive system tests."""
+    print("🚀 PDF Resume Analyzer - System Test Suite\n" + "=" * 60, flush=True)
+    
+    # Check if resume.pdf exists
+    if not RESUME.is_file():
+        print(f"❌ resume.pdf not found. Please ensure the sample resume is at {RESUME_PATH}.")
+        return False
+    
+    # Run tests against an empty app cache, so LLM output cached by earlier
+    # runs (or by real use) is never replayed. It is set in the environment
+    # before main.py is imported or any child is started, since settings are
+    # read once at import.
+    total = len(TEST_CASES)
+    with tempfile.TemporaryDirectory(prefix="pdf_analyzer_test_cache_") as app_cache_dir:
+        os.environ["CACHE_DIR"] = app_cache_dir
+        passed = run_tests(TEST_CASES, use_cache, in_process)
     
     # Summary
-    print("\n" + "=" * 60)
-    print(f"📊 TEST SUMMARY: {passed}/{total} tests passed")
+    summary = io.StringIO()
+    print("\n" + "=" * 60, file=summary)
+    print(f"📊 TEST SUMMARY: {passed}/{total} tests passed", file=summary)
     
     if passed == total:
-        print("🎉 ALL TESTS PASSED! System is ready for use.")
-        print("\n📖 Usage Examples:")
-        print("  python3 main.py --pdf resume.pdf --interactive")
-        print("  python3 main.py --pdf resume.pdf --question 'What are their skills?'")
-        return True
+        print("🎉 ALL TESTS PASSED! System is ready for use.", file=summary)
+        print("\n📖 Usage Examples:", file=summary)
+        print("  python3 main.py --pdf resume.pdf --interactive", file=summary)
+        print("  python3 main.py --pdf resume.pdf --question 'What are their skills?'", file=summary)
     else:
-        print(f"⚠️  {total - passed} tests failed. Please check the errors above.")
-        return False
+        print(f"⚠️  {total - passed} tests failed. Please check the errors above.", file=summary)
+    sys.stdout.write(summary.getvalue())
+    return passed == total
 
 
 if __name__ == "__main__":
-    success = main()
+    parser = argparse.ArgumentParser(description="Run the system test suite.")
+    parser.add_argument("--no-cache", action="store_true", help="Rerun tests that passed before without changes")
+    parser.add_argument("--subprocess", action="store_true",
+                        help="Run the tests in fresh interpreters, in parallel, instead of in this process")
+    parser.add_argument("--only", metavar="DESCRIPTION",
+                        help="Run just the test whose description matches, in place of this process")
+    args = parser.parse_args()
+    if args.only:
+        run_only(args.only)
+    success = main(use_cache=not args.no_cache, in_process=not args.subprocess)
     sys.exit(0 if success else 1)